@@ -3,12 +3,13 @@
 import json
 import os
 from glob import glob
+from itertools import islice
 from tqdm import tqdm
 import time
 import spacy
 import torch
 from spacy.matcher import PhraseMatcher
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from multiprocessing import cpu_count
 
 from scripts import cord_loader
@@ -71,9 +72,24 @@ def run_pubmed_bulk_loader(pbl_config: dict, ignore: bool):
         return
 
     print("Running pubmed bulk downloader script.")
-    pubmed_bulk.run_pbl(pbl_config)
+    pubmed_bulk.run_pbl(pbl_config, cpu_limit=min(CPU_LIMIT,cpu_count()))
     
 
+def submit_batches(executor, fn, config, batches, max_pending, **kwargs):
+    '''
+    submit fn(config, idx, batch, **kwargs) for each batch and yield the futures as they complete
+    at most max_pending batches are queued at once, so a lazy batch iterator is only consumed as workers free up
+    '''
+    pending = set()
+    for idx, batch in enumerate(batches):
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from done
+        pending.add(executor.submit(fn, config, idx, batch, **kwargs))
+
+    yield from as_completed(pending)
+
+
 def run_splitter(splitter_config: dict, ignore: bool) -> dict:
     if ignore:
         print("Ignoring script: splitter.")
@@ -118,10 +134,9 @@ def run_splitter(splitter_config: dict, ignore: bool) -> dict:
 
 
     else:        
-        with open(splitter_config["input_path"], "r",encoding="utf-8") as f:
-            full_articles = json.loads(f.read())
-
-        article_batches = splitter.make_batches(list(full_articles), splitter_config["batch_size"])
+        # stream the articles and cut them into batch_size dicts, so each worker only receives its own batch
+        articles_iter = util.iter_articles(splitter_config["input_path"])
+        article_batches = iter(lambda: dict(islice(articles_iter, splitter_config["batch_size"])), {})
 
         # split each batch
         if splitter_config["tokenizer"] == 'spacy':
@@ -129,10 +144,10 @@ def run_splitter(splitter_config: dict, ignore: bool) -> dict:
             
             with ProcessPoolExecutor(min(CPU_LIMIT,cpu_count())) as executor:
                 
-                futures=[executor.submit(splitter.split_batch,splitter_config, idx, art, full_articles,
-                    tokenizer="spacy") for idx, art in enumerate(article_batches)]
+                futures=submit_batches(executor, splitter.split_batch, splitter_config,
+                    article_batches, max_pending=2*min(CPU_LIMIT,cpu_count()), tokenizer="spacy")
                 
-                for future in as_completed(futures):
+                for future in futures:
                     #print(future.result)
                     i = future.result()
                     
@@ -146,10 +161,10 @@ def run_splitter(splitter_config: dict, ignore: bool) -> dict:
             
             with ProcessPoolExecutor(min(CPU_LIMIT,cpu_count())) as executor:
                 
-                futures=[executor.submit(splitter.split_batch,splitter_config,idx, art, full_articles,
-                    tokenizer="nltk") for idx, art in enumerate(article_batches)]
+                futures=submit_batches(executor, splitter.split_batch, splitter_config,
+                    article_batches, max_pending=2*min(CPU_LIMIT,cpu_count()), tokenizer="nltk")
                 
-                for future in as_completed(futures):
+                for future in futures:
                     i = future.result()
                 
 
@@ -226,7 +241,7 @@ def run_analysis(analysis_config: dict, ignore: bool):
 
     print("Running analysis script.")
 
-    analysis.run(analysis_config)
+    analysis.run(analysis_config, cpu_limit=min(CPU_LIMIT,cpu_count()))
 
     print("Finished running analysis script.")
 
@@ -253,7 +268,7 @@ def run_merger(config: dict, ignore: bool):
 
     merger_config = config["merger"]
     
-    entity_merger.run_entity_merger(merger_config)
+    entity_merger.run_entity_merger(merger_config, cpu_limit=min(CPU_LIMIT,cpu_count()))
     
     print("Finished running merger script.")
 
@@ -267,7 +282,7 @@ def run_search(config: dict, ignore: bool):
     search_config = config["result_inspection"]
 
     os.makedirs(os.path.dirname(search_config["output_file"]), exist_ok=True)
-    searcher = search.EntitySearch(search_config)
+    searcher = search.EntitySearch(search_config, cpu_limit=min(CPU_LIMIT,cpu_count()))
     searcher.run()
     
     print("Finished running result inspection script.")
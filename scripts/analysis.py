@@ -1,12 +1,14 @@
 # coding=utf-8
 
 import os
-import json
 from glob import glob
 from tqdm import tqdm
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from . import util
 
 def get_input_files(input_folder_path):
     '''
@@ -15,55 +17,84 @@ def get_input_files(input_folder_path):
     return sorted(glob(f'{input_folder_path}*.json'), key=lambda x: int(os.path.splitext(os.path.basename(x))[0].split("-")[-1]))
 
 
-def run_analysis(input_files_list):
+def count_batch_entities(batch):
     '''
-    Get input files list and return NER results per batch and per article 
+    count entities within a single NER result file
+    returns the number of articles, the batch index, entity counts and the articles each entity appears in
     '''
-    d_main= {}
-    if len(input_files_list) == 0:
-        raise Exception ("Error! No input file could be detected. Please provide a correct path!")
-        
+    #check for file naming errors
+    try:
+        idx = int(os.path.splitext(os.path.basename(batch))[0].split("-")[-1])
+    except:
+        raise Exception("Error! NER files do not contain index in the end. Add index to the designated files.")
+
+    entity_counts = Counter()
+    entity_articles = defaultdict(set)
     count_articles=0
-    for batch in tqdm(input_files_list):
-        
-        #check for file naming errors
-        try:
-            idx = int(os.path.splitext(os.path.basename(batch))[0].split("-")[-1])
-        except:
-            raise Exception("Error! NER files do not contain index in the end. Add index to the designated files.")
-
-        with open(batch, encoding="utf8") as f:
-            articles = json.loads(f.read())
-        
-        count_articles+=len(articles)
-        #Loop over articles    
-        for art in tqdm(articles):
-    #         print(art)
+    #Loop over articles    
+    for art, article in util.iter_articles(batch):
+        count_articles+=1
+
+        #loop over each sentence
+        for sent in article["sentences"]:
+            for entity in sent["entities"]:
+                entity_counts[entity]+=1
+                entity_articles[entity].add(art)
+
+    return count_articles, idx, entity_counts, entity_articles
 
-            #loop over each sentence
-            for sent in articles[art]["sentences"]:
-                if len(sent["entities"])!=0:
-                    for entity in sent["entities"]:
-                        if entity not in d_main:
-                            d_main[entity]={"total_count":0,
-                                            "articles_set":set(),
-                                            "batch_count":{},
-                                            "batch_set":set()}
 
-                        d_main[entity]["total_count"]+=1
-                        d_main[entity]["articles_set"].update([art])
-                        d_main[entity]["batch_set"].update([idx])
+def merge_batch_entities(counts, idx, entity_counts, entity_articles):
+    '''
+    merge entity counts of a single batch into the flat counters of the whole run
+    '''
+    counts["total_count"].update(entity_counts)
 
-                        if idx not in d_main[entity]["batch_count"]:
-                            d_main[entity]["batch_count"][idx]=0
+    for entity, n in entity_counts.items():
+        counts["batch_count"][entity][idx] = n
 
-                        d_main[entity]["batch_count"][idx]+=1
+    for entity, articles in entity_articles.items():
+        counts["articles_set"][entity].update(articles)
 
+    return counts
 
-    #                 print(sent["text"])
-    #                 print(sent["entities"])
+
+def run_analysis(input_files_list, cpu_limit=1):
+    '''
+    Get input files list and return NER results per batch and per article 
+    cpu_limit: number of processes used to count the batch files in parallel
+    '''
+    counts = {"total_count": Counter(),
+              "articles_set": defaultdict(set),
+              "batch_count": defaultdict(dict)}
+    if len(input_files_list) == 0:
+        raise Exception ("Error! No input file could be detected. Please provide a correct path!")
+        
+    count_articles=0
+    if cpu_limit > 1:
+        with ProcessPoolExecutor(cpu_limit) as executor:
+            for n_articles, *batch_counts in tqdm(executor.map(count_batch_entities, input_files_list, chunksize=4), total=len(input_files_list)):
+                count_articles+=n_articles
+                merge_batch_entities(counts, *batch_counts)
+    else:
+        for batch in tqdm(input_files_list):
+            n_articles, *batch_counts = count_batch_entities(batch)
+            count_articles+=n_articles
+            merge_batch_entities(counts, *batch_counts)
+
+    # build the dataframe column-wise instead of from a dict of per-entity rows
+    entities = list(counts["total_count"])
+    articles_set = [counts["articles_set"][entity] for entity in entities]
+    batch_count = [counts["batch_count"][entity] for entity in entities]
+    batch_set = [set(batches) for batches in batch_count]
     
-    df = pd.DataFrame.from_dict(d_main, orient="index")
+    df = pd.DataFrame({"total_count": [counts["total_count"][entity] for entity in entities],
+                       "articles_spanned": [len(articles) for articles in articles_set],
+                       "batches_spanned": [len(batches) for batches in batch_set],
+                       "batch_set": batch_set,
+                       "batch_count": batch_count,
+                       "articles_set": articles_set},
+                      index=entities)
 
     if df.empty:
         return df
@@ -71,8 +102,6 @@ def run_analysis(input_files_list):
     #     df.index.name="entity"
         df.sort_values("total_count", ascending=False, inplace=True)
         
-        df["articles_spanned"] = df["articles_set"].str.len()
-        df["batches_spanned"] = df["batch_set"].str.len()
         df["freq_per_article"] = df["total_count"].astype("float")/df["articles_spanned"].astype("float")
         df["freq_per_batch"] = df["total_count"].astype("float")/df["batches_spanned"].astype("float")
         cols = ["total_count", "articles_spanned", "batches_spanned", "freq_per_article", "freq_per_batch", "batch_set", "batch_count","articles_set"]
@@ -122,10 +151,11 @@ def plot_frequency_barchart(df, entity, n):
         return fig, ax
     
     
-def run(analysis_config):
+def run(analysis_config, cpu_limit=1):
     '''
     run analysis
     n= number of top entities to plot
+    cpu_limit= number of processes used when "multiprocessing" is enabled
     '''
     
     
@@ -136,7 +166,8 @@ def run(analysis_config):
     n = int(analysis_config["plot_top_n"]) if "plot_top_n" in analysis_config else 50
     entity=analysis_config["entity_type"]
     input_files_list = get_input_files(input_folder)
-    df = run_analysis(input_files_list)
+    cpu_limit = cpu_limit if analysis_config.get("multiprocessing", False) else 1
+    df = run_analysis(input_files_list, cpu_limit=cpu_limit)
     
     if df.empty:
         print("No detected entities exist within the given data!")
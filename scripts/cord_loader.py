@@ -18,10 +18,8 @@ def run(input_file: str, output_file: str, subset: bool, subset_file: str):
     
     
     if subset==True:
-        uid_set = set()
         with open(subset_file) as f:
-            for line in f.readlines():
-                uid_set.update([line.strip()])
+            uid_set = {line.strip() for line in f}
             print(uid_set)
 
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
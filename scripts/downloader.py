@@ -10,6 +10,10 @@ import sys
 from typing import Any, List
 
 
+# downloaded batches are written to the output file every this many batches
+_save_every = 10
+
+
 def _make_batches(xs: List[Any], size: int):
     for i in range(0, len(xs), size):
         yield xs[i:i+size]
@@ -20,22 +24,29 @@ def _run(input_file: str, output_file: str, batch_size: int):
     for line in open(input_file, "r"):
         lines.append(line.strip())
 
-    pmid_batches = []
-    for batch in _make_batches(lines, batch_size):
-        pmid_batches.append(batch)
-
     i = 0
     n = 0
-    for pmid_batch in pmid_batches:
-        i += 1
-        n += len(pmid_batch)
-        print("Downloading and saving batch {}...".format(i))
-
-        api_url = _build_api_url(pmid_batch, retmode="xml")
-        new_data = _download_data(api_url)
-        _append_json(output_file, new_data)
-
-        print("Saved {}/{} articles so far.\n".format(n, len(lines)))
+    data = {}
+    try:
+        for pmid_batch in _make_batches(lines, batch_size):
+            i += 1
+            n += len(pmid_batch)
+            print("Downloading batch {}...".format(i))
+
+            api_url = _build_api_url(pmid_batch, retmode="xml")
+            data.update(_download_data(api_url))
+
+            print("Downloaded {}/{} articles so far.\n".format(n, len(lines)))
+
+            # Save every few batches instead of after each one, so the growing
+            # output file is rewritten less often but a crash loses little work.
+            if i % _save_every == 0:
+                _append_json(output_file, data)
+                data = {}
+                print("Saved {}/{} articles so far.\n".format(n, len(lines)))
+    finally:
+        if data:
+            _append_json(output_file, data)
 
 
 def _build_api_url(pmid_list: List[str], retmode="xml"):
@@ -1,14 +1,14 @@
 # coding=utf-8
 
-import json
 import os
-import re
-from tqdm import tqdm, trange
+from tqdm import tqdm
 from glob import glob
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from . import util
 
 def read_articles(filename:str):
-    with open(filename, encoding="utf-8") as f:
-        return json.loads(f.read())
+    return util.load_json(filename)
 
 def get_sorted_files(filepath):
     '''
@@ -23,13 +23,13 @@ def process_articles(articles: dict, entity_tag:str):
     '''
     for art in list(articles):
 
-        for i, sent in enumerate(articles[art]["sentences"]):
+        for sent in articles[art]["sentences"]:
             if len(sent["entities"])>0:
-                articles[art]["sentences"][i]["entities"] = {entity_tag:articles[art]["sentences"][i]["entities"]}
-                articles[art]["sentences"][i]["entity_spans"] = {entity_tag:articles[art]["sentences"][i]["entity_spans"]}
+                sent["entities"] = {entity_tag:sent["entities"]}
+                sent["entity_spans"] = {entity_tag:sent["entity_spans"]}
             else:
-                articles[art]["sentences"][i]["entities"] = {}
-                articles[art]["sentences"][i]["entity_spans"] = {} 
+                sent["entities"] = {}
+                sent["entity_spans"] = {} 
 
     return articles
 
@@ -49,10 +49,12 @@ def merge_two_articles(articles_1, articles_2):
         for art1,art2 in zip(list(articles_1), list(articles_2)):
             if art1!=art2:
                 raise Exception("ERR!!!!")
+            sentences_2 = articles_2[art2]["sentences"]
             for i, sent in enumerate(articles_1[art1]["sentences"]):
-                if len(articles_2[art2]["sentences"][i]["entities"])>0:
-                    sent["entities"].update(articles_2[art2]["sentences"][i]["entities"])
-                    sent["entity_spans"].update(articles_2[art2]["sentences"][i]["entity_spans"])
+                sent_2 = sentences_2[i]
+                if len(sent_2["entities"])>0:
+                    sent["entities"].update(sent_2["entities"])
+                    sent["entity_spans"].update(sent_2["entity_spans"])
                     
     return articles_1
 
@@ -73,19 +75,20 @@ def entity_merger(paths:list, entities:list, output_file:str):
         #merge entities
         merged_entities=merge_two_articles(merged_entities, processed_ner_article)
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(json.dumps(merged_entities, indent=2, ensure_ascii=False))
+    util.dump_json(output_file, merged_entities)
         
     return
 
-def run_entity_merger(merger_config: dict):
+def run_entity_merger(merger_config: dict, cpu_limit=1):
     '''
     merge all files within
+    cpu_limit: number of processes used to merge batches in parallel when "multiprocessing" is enabled
     '''
     paths = merger_config["paths"]
     entities = merger_config["entities"]
     output_folder = merger_config["output_path"]
     output_prefix = merger_config["output_prefix"]
+    cpu_limit = cpu_limit if merger_config.get("multiprocessing", False) else 1
     os.makedirs(output_folder, exist_ok=True)
 
     file_lists = {entity:get_sorted_files(path) for path, entity in zip(paths, entities)}
@@ -93,16 +96,23 @@ def run_entity_merger(merger_config: dict):
     if len(set([len(v) for k,v in file_lists.items()]))!=1:
         raise Exception("ERROR! Mismatched number of files in given folders")
     
-    for i in trange(len(file_lists[entities[0]])):
-        processed_paths = [file_lists[j][i] for j in entities]
-        output_file = output_folder+output_prefix + str(get_batch_no_from_filename(processed_paths[0])) +".json"
+    batch_paths = [[file_lists[j][i] for j in entities] for i in range(len(file_lists[entities[0]]))]
+    output_files = [output_folder+output_prefix + str(get_batch_no_from_filename(processed_paths[0])) +".json"
+                    for processed_paths in batch_paths]
 
-        entity_merger(paths=processed_paths, entities=entities,output_file=output_file)
+    if cpu_limit > 1:
+        # batches are merged independently, so each one can be read, merged and written in its own process
+        with ProcessPoolExecutor(cpu_limit) as executor:
+            for _ in tqdm(executor.map(entity_merger, batch_paths, repeat(entities), output_files), total=len(batch_paths)):
+                pass
+    else:
+        for processed_paths, output_file in tqdm(zip(batch_paths, output_files), total=len(batch_paths)):
+            entity_merger(paths=processed_paths, entities=entities,output_file=output_file)
         
     return 
     
 def get_batch_no_from_filename(filename):
-    return re.findall(r'\d+',filename)[-1]
+    return util.get_batch_no(filename)
 
 def check_match_batch_index(filename1, filename2):
     return get_batch_no_from_filename(filename1) == get_batch_no_from_filename(filename2)
@@ -1,6 +1,21 @@
 # coding=utf-8
 
 import json
+from collections import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def load_articles(input_file):
+    # parse with orjson when installed, this script is run standalone so it does not use scripts.util
+    if orjson is not None:
+        with open(input_file, "rb") as f:
+            return orjson.loads(f.read())
+
+    with open(input_file, "r",encoding="utf-8") as f:
+        return json.loads(f.read())
 
 def count_frequent_terms_from_ner(input_file, output_file, per_article=False):
     '''
@@ -8,10 +23,7 @@ def count_frequent_terms_from_ner(input_file, output_file, per_article=False):
     input_file: JSON input file path with entities
     output_file: output file path with frequencies'''
     
-    with open(input_file, "r",encoding="utf-8") as f:
-        articles = json.loads(f.read())
-        
-    dict_freq = {}
+    articles = load_articles(input_file)
     
     if per_article:
         
@@ -19,34 +31,26 @@ def count_frequent_terms_from_ner(input_file, output_file, per_article=False):
         
             for i, (pmid, art) in enumerate(articles.items()):
 
-                dict_freq[pmid]={}
+                dict_freq = Counter()
 
                 for sent in art["sentences"]:
-                    if len(sent["entities"])!=0:
-
-                        for ent in sent["entities"]:
-                            if ent not in dict_freq[pmid]:
-                                dict_freq[pmid][ent] = 0
-                            dict_freq[pmid][ent]+=1
+                    # merged output maps tag -> entity list, iterate so only the keys are counted
+                    dict_freq.update(iter(sent["entities"]))
                             
-                for k, v in sorted(dict_freq[pmid].items(), key=lambda item: item[1], reverse=True):
+                for k, v in dict_freq.most_common():
                     f.write(f"{pmid}\t{k}\t{v}\n")
 
     
     else:
+        dict_freq = Counter()
         
         for i, (pmid, art) in enumerate(articles.items()):
     
             for sent in art["sentences"]:
-                if len(sent["entities"])!=0:
-
-                    for ent in sent["entities"]:
-                        if ent not in dict_freq:
-                            dict_freq[ent] = 0
-                        dict_freq[ent]+=1
+                dict_freq.update(iter(sent["entities"]))
     
         with open(output_file, "w", encoding="utf-8") as f:
-            for k, v in sorted(dict_freq.items(), key=lambda item: item[1], reverse=True):
+            for k, v in dict_freq.most_common():
                 f.write(f"{k}\t{v}\n")
                 
 
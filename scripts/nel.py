@@ -12,6 +12,11 @@ def NEL(lookupfile, inputfile, outputfile):
     # read lookup file into pandas dataframe
     lookup = pd.read_csv(lookupfile, sep='\t')
 
+    # map each term to its IDs once, instead of scanning the whole table for every entity
+    term_ids = {}
+    for term, id_ in zip(lookup['term'].tolist(), lookup['ID'].tolist()):
+        term_ids.setdefault(term, []).append(id_)
+
     # read JSON file
     with open(inputfile) as f:
         data = json.load(f)
@@ -23,7 +28,7 @@ def NEL(lookupfile, inputfile, outputfile):
             # find the matching entity IDs
             entity_ids = []
             for entity in sentence['entities']:
-                entity_id = lookup.loc[lookup['term'] == entity, 'ID'].tolist()
+                entity_id = term_ids.get(entity)
                 if entity_id:
                     entity_ids.extend(entity_id)
                 else:
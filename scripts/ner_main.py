@@ -2,9 +2,6 @@
 
 import spacy
 import os
-import re
-import json
-import pandas as pd
 from tqdm import tqdm
 from spacy.matcher import PhraseMatcher
 from datasets import Dataset, load_dataset
@@ -16,13 +13,11 @@ def run_ner_main(ner_config: dict, batch_file, device=-1):
     run NER in batches from sentence splitter output
     '''
 
-    with open(batch_file, "r",encoding="utf-8") as f:
-        articles = json.loads(f.read())
+    articles = util.load_json(batch_file)
     
     # get batch IDs
-    regex=re.compile(r'\d+')
     try:
-        batch_index=int(regex.findall(os.path.basename(batch_file))[-1])
+        batch_index=int(util.get_batch_no(batch_file))
     except:
         print(batch_file)
         raise Exception("Filenames not numbered!")
@@ -160,19 +155,18 @@ def biobert_process_articles(articles, column_names=["pmid", "sent_idx", "text"]
     '''
 
     
-    articles_processed = []
+    # fill the columns directly instead of going through a list of rows and a pandas dataframe
+    pmids = []
+    sent_idxs = []
+    texts = []
     
     for pmid, content in articles.items():
-        l = []
-        sent_idx = 0
-        for sent in content["sentences"]:
-            articles_processed.append([pmid, sent_idx, sent["text"]])
-            sent_idx+=1
-    
-    articles_df = pd.DataFrame(articles_processed)
-    articles_df.columns = column_names
+        for sent_idx, sent in enumerate(content["sentences"]):
+            pmids.append(pmid)
+            sent_idxs.append(sent_idx)
+            texts.append(sent["text"])
 
-    articles_ds = Dataset.from_pandas(articles_df)
+    articles_ds = Dataset.from_dict(dict(zip(column_names, [pmids, sent_idxs, texts])))
 
     return articles_ds
 
@@ -190,13 +184,9 @@ def convert_dataset_to_dict(articles, ner_dataset):
         sent_idx = row["sent_idx"]
         text = row["text"]
         prediction = row["prediction"]
-        articles[pmid]["sentences"][sent_idx]["entities"]=[]
-        articles[pmid]["sentences"][sent_idx]["entity_spans"]=[]
-        
-        if len(prediction)!=0:
-            for pred in prediction:
-                articles[pmid]["sentences"][sent_idx]["entities"].append(pred["word"])
-                articles[pmid]["sentences"][sent_idx]["entity_spans"].append([pred["start"], pred["end"]])
+        sentence = articles[pmid]["sentences"][sent_idx]
+        sentence["entities"] = [pred["word"] for pred in prediction]
+        sentence["entity_spans"] = [[pred["start"], pred["end"]] for pred in prediction]
             
     return articles
 
@@ -8,11 +8,12 @@ from glob import glob
 import os
 import argparse
 import pubmed_parser as pp
-import json
 import requests
 import urllib.request
 import time
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm, trange
+from . import util
 
 def bulk_download(n_start=0, n_end=10000, nupdate=False, u_start=1167, u_end=3000, save_path="data/tmp/pubmed/", baseline=23):
     '''
@@ -72,12 +73,14 @@ def count_articles(input_path, baseline=23):
     pmid_writer  = open(pmid_file, "w", encoding="utf-8")
     
     for infile in tqdm(input_files):
-        with open(infile, "r",encoding="utf-8") as f:
-                full_articles = json.loads(f.read())
+        # only the pmids are needed, so stream the articles instead of loading the whole file
+        n_articles = 0
+        for pmid, _ in util.iter_articles(infile):
+            pmids.append(pmid)
+            n_articles+=1
         
-        count_writer.write(f"{os.path.splitext(os.path.basename(infile))[0].split(k)[-1]}\t{len(full_articles)}\n")
-        count+=len(full_articles)
-        pmids.extend([k for k in full_articles])
+        count_writer.write(f"{os.path.splitext(os.path.basename(infile))[0].split(k)[-1]}\t{n_articles}\n")
+        count+=n_articles
     
     count_writer.write(f"total\t{count}")
     count_writer.close()
@@ -89,11 +92,12 @@ def count_articles(input_path, baseline=23):
 
 class PubMedLoader:
     
-    def __init__(self, input_path,  output_path, k:str):
+    def __init__(self, input_path,  output_path, k:str, cpu_limit=1):
         self.input_path = input_path
         self.output_path = output_path
         self.counter = {}
         self.k=k
+        self.cpu_limit=cpu_limit
         os.makedirs(output_path, exist_ok=True)
         
     def get_input_files(self, input_path):
@@ -127,18 +131,29 @@ class PubMedLoader:
 
     def write_to_json(self, data, input_file):
         outfile = os.path.join(self.output_path, os.path.basename(input_file.split(".xml")[0])+".json")
-        with open(outfile, "w", encoding="utf-8") as f:
-            f.write(json.dumps(data, indent=2, ensure_ascii=False))
+        util.dump_json(outfile, data)
+            
+    def convert_file(self, input_file):
+        '''
+        convert a single raw file to JSON and return its article count
+        '''
+        data = self.load_xml_and_convert(input_file)
+        self.write_to_json(data, input_file)
+        return input_file, self.counter[input_file]
             
     def run_loader(self):
         input_files_list = self.get_input_files(self.input_path)
         
-        for i, input_file in tqdm(enumerate(input_files_list)):
-            
-            data = self.load_xml_and_convert(input_file)
-            self.write_to_json(data, input_file)
+        if self.cpu_limit > 1:
+            # each file is parsed in its own process, counts are collected here since workers only update their own copy
+            with ProcessPoolExecutor(self.cpu_limit) as executor:
+                for input_file, count in tqdm(executor.map(self.convert_file, input_files_list), total=len(input_files_list)):
+                    self.counter[input_file] = count
+        else:
+            for i, input_file in tqdm(enumerate(input_files_list)):
+                self.convert_file(input_file)
 
-def run_pbl(pbl_config):
+def run_pbl(pbl_config, cpu_limit=1):
 
     # print("Downloading files...")
 
@@ -179,7 +194,8 @@ def run_pbl(pbl_config):
 
     loader = PubMedLoader(input_path=download_path,
                             output_path=pbl_config["output_path"],
-                            k=pbl_config["baseline"])
+                            k=pbl_config["baseline"],
+                            cpu_limit=cpu_limit if pbl_config.get("multiprocessing", False) else 1)
      
     loader.run_loader()
 
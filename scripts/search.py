@@ -1,54 +1,70 @@
 # coding=utf-8
 ## THis script is used to search for entities in a list from output abstracts
 
-import json
 import os
 from tqdm import tqdm
 from glob import glob
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from . import util
 
 class EntitySearch:
 
-    def __init__(self, search_config:dict):
+    def __init__(self, search_config:dict, cpu_limit=1):
         
         self.input_folder = search_config["input_folder"]
         self.output_file = search_config["output_file"]
         self.entities = search_config["entities"]
+        self.cpu_limit = cpu_limit if search_config.get("multiprocessing", False) else 1
         
         
     def sort_files(self, input_folder):
         
         return sorted(glob(f'{input_folder}*.json'), key=lambda x: int(os.path.splitext(os.path.basename(x))[0].split("-")[-1]))
         
-    def read_files(self, input_file):
+    def search_file(self, input_file, entities):
         
-        with open(input_file, encoding="utf8") as f:
-            articles = json.loads(f.read())
+        '''
+        search entities within a file
+
+        '''
+        
+        file_dict = {}
+        entities = set(entities)
+        for art, val in util.iter_articles(input_file):
+            for sent in val["sentences"]:
+                # store each matching sentence once, even if it contains several of the searched entities
+                if not entities.isdisjoint(sent["entities"]):
+                    if art not in file_dict:
+                        file_dict[art]={"sentences":[]}
+                    file_dict[art]["sentences"].append({"text":sent["text"], "entities": sent["entities"], "entity_spans": sent["entity_spans"]})
         
-        return articles
+        return file_dict
         
     def search(self, input_files_list, entities):
         
         '''
-        search entities within a file
-
+        search entities within all files, in parallel when cpu_limit > 1
+        results are merged here in file order so a single writer saves them
         '''
         
         main_dict = {}
-        for idx, input_file in tqdm(enumerate(input_files_list)):
-        
-            articles = self.read_files(input_file)
-            
-            for art, val in tqdm(articles.items()):
-                for sent in val["sentences"]:
-                    if len(sent["entities"])==0:
-                        continue
-                    else:
-                        for entity in entities:
-                            if entity in sent["entities"]:
-                                if art not in main_dict:
-                                    main_dict[art]={"sentences":[]}
-                                main_dict[art]["sentences"].append({"text":sent["text"], "entities": sent["entities"], "entity_spans": sent["entity_spans"]})
+        if self.cpu_limit > 1:
+            with ProcessPoolExecutor(self.cpu_limit) as executor:
+                for file_dict in tqdm(executor.map(self.search_file, input_files_list, repeat(entities)), total=len(input_files_list)):
+                    self.merge_results(main_dict, file_dict)
+        else:
+            for input_file in tqdm(input_files_list):
+                self.merge_results(main_dict, self.search_file(input_file, entities))
+        
+        return main_dict
+        
+    def merge_results(self, main_dict, file_dict):
+        
+        for art, val in file_dict.items():
+            if art not in main_dict:
+                main_dict[art]={"sentences":[]}
+            main_dict[art]["sentences"].extend(val["sentences"])
         
         return main_dict
         
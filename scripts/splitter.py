@@ -2,8 +2,9 @@
 
 import spacy
 from nltk.tokenize import sent_tokenize
-import json
+from functools import lru_cache
 from tqdm import tqdm
+from . import util
 
 def make_batches(list_id, n):
     #Yield n-size batches from list of ids
@@ -15,25 +16,41 @@ def split_into_sentences_nltk(text):
     return sentences
 
 
+@lru_cache(maxsize=None)
+def load_spacy_model(modelname):
+    # load each model once per process and reuse it for every article
+    return spacy.load(modelname)
+
 def split_into_sentences_spacy(text,modelname):
     sentences = []
-    nlp = spacy.load(modelname)
+    nlp = load_spacy_model(modelname)
     doc = nlp(text)
 
     for sentence in doc.sents:
         sentences.append(str(sentence))
 
     return sentences
+
+def get_sentence_splitter(tokenizer, model="en_core_web_sm"):
+    '''
+    resolve the tokenizer name to a sentence splitting function once per batch
+    instead of comparing the name for every article
+    '''
+    if tokenizer=="spacy":
+        return lambda text: split_into_sentences_spacy(text, model)
+    elif tokenizer=="nltk":
+        return split_into_sentences_nltk
+    else:
+        raise Exception("ERROR! Proper sentence splitter model not specified!")
     
-def split_batch(splitter_config, batch_idx, batch, full_articles, tokenizer="spacy", model="en_core_web_sm"):
+def split_batch(splitter_config, batch_idx, batch, tokenizer="spacy", model="en_core_web_sm"):
     '''
     Description:
         split sentences in batches
         
     Parameters:
         batch_idx -> int: batch ID
-        batch -> list: full batch with article IDs (for example: pubmed ID)
-        full_articles -> dict: the entire collection of input articles with text
+        batch -> dict: articles of this batch keyed by article ID (for example: pubmed ID)
         tokenizer -> str: "spacy" or "nltk" sentencer
         model -> str: specific spacy model if needed
         
@@ -42,35 +59,21 @@ def split_batch(splitter_config, batch_idx, batch, full_articles, tokenizer="spa
     '''
     
     articles = {}
+    split_into_sentences = get_sentence_splitter(tokenizer, model)
 
-    for idx in tqdm(batch, desc=f'batch:{batch_idx}'):
-        article=full_articles[idx]
-        
-        if tokenizer=="spacy":
+    for idx, article in tqdm(batch.items(), desc=f'batch:{batch_idx}'):
         
-            articles[idx] = {
-                # **articles[id], # include other fields
-                "title": article["title"],
-                "sentences": list(map(
-                    lambda sentence: {"text": sentence},
-                    split_into_sentences_spacy(article["abstract"],model)
-                ))
-                }
-        elif tokenizer=="nltk":
-            articles[idx] = {
-                # **articles[id], # include other fields
-                "title": article["title"],
-                "sentences": list(map(
-                    lambda sentence: {"text": sentence},
-                    split_into_sentences_nltk(article["abstract"])
-                ))
-                }
-        else:
-            raise Exception("ERROR! Proper sentence splitter model not specified!")
+        articles[idx] = {
+            # **articles[id], # include other fields
+            "title": article["title"],
+            "sentences": list(map(
+                lambda sentence: {"text": sentence},
+                split_into_sentences(article["abstract"])
+            ))
+            }
             
     
-    with open(f'{splitter_config["output_folder"]}/{splitter_config["output_file_prefix"]}_{tokenizer}-split-{batch_idx}.json', "w",encoding="utf-8") as f:
-                    f.write(json.dumps(articles, indent=2, ensure_ascii=False))
+    util.dump_json(f'{splitter_config["output_folder"]}/{splitter_config["output_file_prefix"]}_{tokenizer}-split-{batch_idx}.json', articles)
     
     return batch_idx
     
@@ -1,16 +1,10 @@
 # coding=utf-8
 
-import spacy
-from nltk.tokenize import sent_tokenize
-import json
 import os
 from tqdm import tqdm
 from glob import glob
-
-def make_batches(list_id, n):
-    #Yield n-size batches from list of ids
-    for i in range(0, len(list_id), n):
-        yield list_id[i:i + n]
+from . import util
+from .splitter import get_sentence_splitter
 
 def load_pre_batched_files(input_folder, limit=[0,100000000],k="n"):
     if limit==[0,100000000] or limit=="ALL":
@@ -21,13 +15,9 @@ def load_pre_batched_files(input_folder, limit=[0,100000000],k="n"):
         if len(limit)==2:
             if limit[0]>limit[1]:
                  raise Exception("Error! Make sure to enter in the format of [#,#] where # represents lower and upper limit numbers respectively")
-            all_files = sorted(glob(f'{input_folder}*.json'), key=lambda x: int(os.path.splitext(os.path.basename(x))[0].split(k)[-1]))
-            processed_files = []
-            for f in all_files:
-                fidx = int(os.path.splitext(os.path.basename(f))[0].split(k)[-1])
-                if fidx>=limit[0] and fidx<=limit[1]:
-                    processed_files.append(f)    
-            return processed_files
+            # parse each file index once and reuse it for both filtering and sorting
+            indexed_files = [(get_batch_index(f, k=k), f) for f in glob(f'{input_folder}*.json')]
+            return [f for fidx, f in sorted(indexed_files, key=lambda x: x[0]) if fidx>=limit[0] and fidx<=limit[1]]
         
         else:
             raise Exception("ERROR!! Invalid limit parameters. Make sure to enter in the format of [#,#] where # represents lower and upper limit numbers respectively")
@@ -38,26 +28,11 @@ def load_pre_batched_files(input_folder, limit=[0,100000000],k="n"):
              
 
 def load_json(input_file):
-    with open(input_file, "r",encoding="utf-8") as f:
-        return json.loads(f.read())
+    return util.load_json(input_file)
 
 def get_batch_index(input_file, k="n"):
     return int(os.path.splitext(os.path.basename(input_file))[0].split(k)[-1])
-        
-def split_into_sentences_nltk(text):
-    sentences = sent_tokenize(text)
-    return sentences
-
-def split_into_sentences_spacy(text,modelname):
-    sentences = []
-    nlp = spacy.load(modelname)
-    doc = nlp(text)
-
-    for sentence in doc.sents:
-        sentences.append(str(sentence))
 
-    return sentences
-    
 def split_prebatch(splitter_config, input_file, tokenizer="spacy", model="en_core_web_sm"):
     '''
     Description:
@@ -79,36 +54,23 @@ def split_prebatch(splitter_config, input_file, tokenizer="spacy", model="en_cor
     # batch = {k:d[k] for k in list(d)[:20]}
     batch = load_json(input_file=input_file)
     batch_idx = get_batch_index(input_file=input_file)
+    split_into_sentences = get_sentence_splitter(tokenizer, model)
 
 
     for idx in tqdm(batch, desc=f'batch:{batch_idx}'):
         article=batch[idx]
         
-        if tokenizer=="spacy":
-        
-            articles[idx] = {
-                # **articles[id], # include other fields
-                "title": article["title"],
-                "sentences": list(map(
-                    lambda sentence: {"text": sentence},
-                    split_into_sentences_spacy(article["abstract"],model)
-                ))
-                }
-        elif tokenizer=="nltk":
-            articles[idx] = {
-                # **articles[id], # include other fields
-                "title": article["title"],
-                "sentences": list(map(
-                    lambda sentence: {"text": sentence},
-                    split_into_sentences_nltk(article["abstract"])
-                ))
-                }
-        else:
-            raise Exception("ERROR! Proper sentence splitter model not specified!")
+        articles[idx] = {
+            # **articles[id], # include other fields
+            "title": article["title"],
+            "sentences": list(map(
+                lambda sentence: {"text": sentence},
+                split_into_sentences(article["abstract"])
+            ))
+            }
             
     
-    with open(f'{splitter_config["output_folder"]}/{splitter_config["output_file_prefix"]}_{tokenizer}-split-{batch_idx}.json', "w",encoding="utf-8") as f:
-                    f.write(json.dumps(articles, indent=2, ensure_ascii=False))
+    util.dump_json(f'{splitter_config["output_folder"]}/{splitter_config["output_file_prefix"]}_{tokenizer}-split-{batch_idx}.json', articles)
     
     return batch_idx
     
@@ -14,7 +14,7 @@ def load_freetext(input_folder, prefix):
     for id_, file_ in enumerate(input_files_list):
 
         with open(file_, encoding="utf-8") as f:
-            text = " ".join([l.strip() for l in f.readlines()])
+            text = " ".join(l.strip() for l in f)
 
         result[prefix+"_"+str(id_)] = {
                         "title": os.path.splitext(os.path.basename(file_))[0],
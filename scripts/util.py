@@ -1,7 +1,70 @@
 # coding=utf-8
 
 import json
+import mmap
 import os
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# files smaller than this are read directly, mapping them costs more than the copy it saves
+MMAP_MIN_SIZE = 1 << 20
+# files smaller than this are parsed whole, streaming is only worth its per-event cost when the file would not fit comfortably in memory
+STREAM_MIN_SIZE = 1 << 28
+
+_batch_index_regex = re.compile(r'\d+')
+
+
+def load_json(path: str):
+    # orjson parses straight from bytes in C; fall back to stdlib json if it is not installed
+    if orjson is not None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+                return orjson.loads(f.read())
+
+            # large batch files are parsed straight from the page cache without an intermediate bytes copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.read())
+
+
+def iter_articles(path: str):
+    '''
+    yield (article_id, article) pairs from a batch file one at a time
+    very large files are streamed with ijson when installed so that only the current article is held in memory
+    '''
+    if ijson is not None and os.path.getsize(path) >= STREAM_MIN_SIZE:
+        with open(path, "rb") as f:
+            yield from ijson.kvitems(f, "", use_float=True)
+    else:
+        yield from load_json(path).items()
+
+
+def dump_json(path: str, data):
+    # same indentation and key layout as json.dumps(indent=2, ensure_ascii=False), serialised in C when orjson is installed
+    # orjson formats some floats differently (1e-7 vs 1e-07) and writes NaN/Infinity as null
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def get_batch_no(filename: str):
+    # batch files are numbered by the last run of digits in their name, e.g. ner_chemical-12.json
+    return _batch_index_regex.findall(os.path.basename(filename))[-1]
 
 
 def append_to_json_file(path: str, new_data: dict):
@@ -9,11 +72,8 @@ def append_to_json_file(path: str, new_data: dict):
         with open(path, "w", encoding="utf-8") as f:
             f.write("{}")
 
-    with open(path, "r", encoding="utf-8") as f:
-        old_data = json.loads(f.read())
+    old_data = load_json(path)
 
     data = {**old_data, **new_data}  # Merge dicts (new overwrites old)
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(json.dumps(data, indent=2, ensure_ascii=False))
-        
+    dump_json(path, data)